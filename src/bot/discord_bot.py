@@ -1,18 +1,20 @@
 import asyncio
-import logging.config
+import logging
 
 import discord
+import stripe
 from aiohttp import web
 from discord.ext import commands
+from sqlalchemy import text
 
 from src.cogs.message_handler import MessageHandler
 from src.cogs.payment import PaymentCog
 from src.cogs.subscription import SubscriptionCog
 from src.cogs.ticket import TicketCog
-from src.config.logger import LOGGING
+from src.config.settings import EnvSettings
 from src.core.database import get_db
+from src.core.utils import handle_stripe_event
 
-logging.config.dictConfig(LOGGING)
 logger = logging.getLogger(__name__)
 
 
@@ -40,9 +42,8 @@ class DiscordBot(commands.Bot):
         """
         logger.info("Health check requested")
         try:
-            db = next(get_db())
-            db.execute("SELECT 1")
-            db.close()
+            async with get_db() as db:
+                await db.execute(text("SELECT 1"))
             logger.info("Database connection successful")
             return web.json_response({"status": "ok"})
         except Exception as e:
@@ -51,10 +52,34 @@ class DiscordBot(commands.Bot):
                 {"status": "error", "message": str(e)}, status=500
             )
 
+    @staticmethod
+    async def stripe_webhook(request: web.Request) -> web.Response:
+        """
+        Stripe webhook endpoint for the HTTP server.
+
+        Verifies the Stripe-Signature header and refreshes the cached Stripe state from the event.
+        """
+        payload = await request.read()
+        signature = request.headers.get("Stripe-Signature", "")
+        try:
+            event = stripe.Webhook.construct_event(
+                payload, signature, EnvSettings.STRIPE_WEBHOOK_SECRET
+            )
+        except (ValueError, stripe.error.SignatureVerificationError) as e:
+            logger.warning("Rejected Stripe webhook: %s", e)
+            return web.json_response({"status": "invalid"}, status=400)
+
+        handle_stripe_event(event)
+        return web.json_response({"status": "ok"})
+
     async def start_http_server(self) -> None:
-        """Start the HTTP server for health checks."""
+        """Start the HTTP server for health checks and Stripe webhooks."""
         app = web.Application()
         app.router.add_get("/health", self.health_check)
+        if EnvSettings.STRIPE_WEBHOOK_SECRET:
+            app.router.add_post("/stripe/webhook", self.stripe_webhook)
+        else:
+            logger.warning("STRIPE_WEBHOOK_SECRET not set; Stripe webhook endpoint disabled")
         runner = web.AppRunner(app)
         await runner.setup()
         site = web.TCPSite(runner, "0.0.0.0", 8080)
@@ -1,4 +1,4 @@
-import logging.config
+import logging
 from typing import Optional
 
 import discord
@@ -6,9 +6,7 @@ from discord.ext import commands
 
 from src.cogs.payment import PaymentCog
 from src.cogs.ticket import TicketCog
-from src.config.logger import LOGGING
 
-logging.config.dictConfig(LOGGING)
 logger = logging.getLogger(__name__)
 
 
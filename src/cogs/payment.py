@@ -1,7 +1,6 @@
-import asyncio
-import logging.config
+import logging
 from datetime import datetime
-from sqlalchemy.future import select
+from sqlalchemy import select
 from typing import Optional
 
 import discord
@@ -10,7 +9,6 @@ from discord.ext import commands
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.config.logger import LOGGING
 from src.config.settings import (
     ConfigConstants,
     get_welcome_message,
@@ -19,7 +17,6 @@ from src.core.database import get_db
 from src.core.models import Payment, User
 from src.core.utils import verify_payment_intent
 
-logging.config.dictConfig(LOGGING)
 logger = logging.getLogger(__name__)
 
 
@@ -45,7 +42,7 @@ class PaymentCog(commands.Cog):
 
         async with get_db() as db:
             try:
-                user = await self.get_user(db, str(ctx.author.id))
+                user = await self.get_user(db, ctx.author.id)
                 if not user:
                     await ctx.send(f"{ctx.author.mention}, you do not have any tickets.")
                     return
@@ -85,7 +82,7 @@ class PaymentCog(commands.Cog):
                 )
 
     async def get_user(
-            self, db: AsyncSession, discord_id: str
+            self, db: AsyncSession, discord_id: int
     ) -> Optional[User]:
         """
         Retrieve the user from the database based on Discord ID.
@@ -195,7 +192,7 @@ class PaymentCog(commands.Cog):
                 return
 
             result = await db.execute(
-                select(Payment).filter(Payment.order_id == order_id)
+                select(Payment).where(Payment.order_id == order_id)
             )
             existing_payment = result.scalar_one_or_none()
             if existing_payment:
@@ -213,7 +210,6 @@ class PaymentCog(commands.Cog):
                 order_id=order_id,
                 confirmation_image=image_url,
                 confirmed=True,
-                created_at=datetime.utcnow(),
             )
             db.add(payment)
             await db.commit()
@@ -230,7 +226,7 @@ class PaymentCog(commands.Cog):
                 return
 
             try:
-                await ctx.author.add_roles(premium_role)
+                await ctx.author.add_roles(premium_role, reason="Payment verified")
                 await ctx.send(
                     f"🎉 **Payment Confirmed!**\n\n"
                     f"{ctx.author.mention}, you have been granted the **PREMIUM** role. Enjoy your premium benefits! 🎊"
@@ -274,7 +270,7 @@ class PaymentCog(commands.Cog):
         self, payment_intent_id: str
     ) -> Optional[stripe.PaymentIntent]:
         """
-        Verify the PaymentIntent ID asynchronously.
+        Verify the PaymentIntent ID with Stripe.
 
         Args:
             payment_intent_id (str): The Stripe PaymentIntent ID.
@@ -282,10 +278,7 @@ class PaymentCog(commands.Cog):
         Returns:
             Optional[stripe.PaymentIntent]: The PaymentIntent object if verified, else None.
         """
-        loop = asyncio.get_event_loop()
-        payment_intent = await loop.run_in_executor(
-            None, verify_payment_intent, payment_intent_id
-        )
+        payment_intent = await verify_payment_intent(payment_intent_id)
         return payment_intent
 
     @staticmethod
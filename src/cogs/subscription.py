@@ -1,13 +1,12 @@
 import asyncio
-import logging.config
+import logging
 from datetime import datetime, timedelta
 from typing import Optional
 
 import discord
 from discord.ext import commands
-from sqlalchemy.future import select
+from sqlalchemy import select
 
-from src.config.logger import LOGGING
 from src.config.settings import ConfigConstants
 from src.core.database import get_db
 from src.core.models import User
@@ -17,7 +16,6 @@ from src.core.utils import (
     calculate_remaining_days,
 )
 
-logging.config.dictConfig(LOGGING)
 logger = logging.getLogger(__name__)
 
 
@@ -123,7 +121,7 @@ class SubscriptionCog(commands.Cog):
         Returns:
             Optional[int]: Remaining subscription days if active, else None.
         """
-        customer = get_customer_by_email(email)
+        customer = await get_customer_by_email(email, with_subscriptions=True)
         if not customer:
             await self.send_dm(
                 ctx.author,
@@ -173,7 +171,7 @@ class SubscriptionCog(commands.Cog):
         Returns:
             bool: True if renewal was successful, False otherwise.
         """
-        customer = get_customer_by_email(email)
+        customer = await get_customer_by_email(email, with_subscriptions=True)
         if not customer:
             await self.send_dm(
                 ctx.author,
@@ -202,7 +200,7 @@ class SubscriptionCog(commands.Cog):
             async with get_db() as db:
                 user = (
                     await db.execute(
-                        select(User).where(User.discord_id == str(ctx.author.id))
+                        select(User).where(User.discord_id == ctx.author.id)
                     )
                 ).scalar_one_or_none()
                 if user:
@@ -1,24 +1,24 @@
 import asyncio
-import logging.config
+import logging
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, Optional
 
 import discord
 from discord.ext import commands
-from sqlalchemy.future import select
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 
 from src.buttons.kb_amount_selection import AmountSelectionView
 from src.buttons.kb_confirm_payment import ConfirmPaymentView
 from src.buttons.kb_currency import CurrencyView
 from src.buttons.kd_order_id import OrderIDView
 from src.cogs.restart_payment import RestartPaymentView
-from src.config.logger import LOGGING
 from src.core.database import get_db
 from src.core.models import Ticket, User
 from src.core.utils import create_payment_intent
 
-logging.config.dictConfig(LOGGING)
 logger = logging.getLogger(__name__)
 
 
@@ -29,8 +29,53 @@ class TicketCog(commands.Cog):
         self.bot = bot
         self.premium_role_id = premium_role_id
         self.admin_user_id = admin_user_id
+        self._admin_queue: asyncio.Queue = asyncio.Queue()
+        self._admin_worker: Optional[asyncio.Task] = None
+        self._overwrite_cache: Dict[int, Dict[Any, discord.PermissionOverwrite]] = {}
+        self._step_embeds = self.build_step_embeds()
         logger.info("TicketCog initialized")
 
+    @staticmethod
+    def build_step_embeds() -> Dict[str, discord.Embed]:
+        """Build the static embeds used for each step of the payment conversation."""
+        return {
+            "currency": discord.Embed(
+                title="Step 1: Select Your Payment Currency",
+                description="Please choose your payment currency from the following options:",
+            ),
+            "amount": discord.Embed(
+                title="Step 2: Select the Payment Amount",
+                description=(
+                    "You have selected **{currency}** as your payment currency.\n"
+                    "Please select the amount you have paid from the options below:"
+                ),
+            ),
+            "order_id": discord.Embed(
+                title="Step 3: Provide Your Order ID",
+                description=(
+                    "Please click the button below to enter your **Order ID** "
+                    "associated with this payment."
+                ),
+            ),
+            "upload": discord.Embed(
+                title="Step 5: Upload Your Payment Confirmation",
+                description=(
+                    "Please upload your payment confirmation image along with the "
+                    "PaymentIntent ID in this channel.\n\n"
+                    "🔗 *Example:* pi_1Hh1XYZAbCdEfGhIjKlMnOpQ"
+                ),
+            ),
+        }
+
+    async def cog_load(self) -> None:
+        """Start the worker that delivers admin notifications."""
+        self._admin_worker = asyncio.create_task(self._drain_admin_queue())
+
+    async def cog_unload(self) -> None:
+        """Stop the admin notification worker."""
+        if self._admin_worker:
+            self._admin_worker.cancel()
+
     @commands.command(name='delete_ticket')
     async def delete_ticket(self, ctx: commands.Context) -> None:
         """Delete the user's open ticket."""
@@ -39,7 +84,7 @@ class TicketCog(commands.Cog):
         member = ctx.author
 
         async with get_db() as db:
-            user = await self.get_user(db, str(member.id))
+            user = await self.get_user(db, member.id)
             if not user:
                 await ctx.send(f"{member.mention}, you do not have any tickets.")
                 return
@@ -72,7 +117,7 @@ class TicketCog(commands.Cog):
         user_id = str(ctx.author.id)
 
         async with get_db() as db:
-            user = await self.get_user(db, user_id)
+            user = await self.get_user(db, ctx.author.id)
             if not user:
                 await ctx.send("⚠️ You do not have an open ticket.")
                 return
@@ -96,7 +141,7 @@ class TicketCog(commands.Cog):
         guild = ctx.guild
 
         async with get_db() as db:
-            user = await self.get_or_create_user(db, user_id)
+            user = await self.get_or_create_user(db, int(user_id))
             existing_ticket = await self.get_existing_ticket(db, user.id)
 
             if existing_ticket:
@@ -117,7 +162,6 @@ class TicketCog(commands.Cog):
             new_ticket = Ticket(
                 channel_id=str(ticket_channel.id),
                 user_id=user.id,
-                created_at=datetime.utcnow(),
             )
             db.add(new_ticket)
             await db.commit()
@@ -136,26 +180,24 @@ class TicketCog(commands.Cog):
 
     async def start_ticket_conversation(self, channel: discord.TextChannel, user_id: str) -> None:
         """Start the conversation with the user to verify payment details."""
+        steps = (
+            ("currency", lambda _state: self.select_currency(channel, user_id)),
+            ("amount", lambda state: self.select_amount(channel, user_id, state["currency"])),
+            ("order_id", lambda _state: self.provide_order_id(channel, user_id)),
+            ("payment_intent_id", lambda state: self.confirm_payment(
+                channel, user_id, state["amount"], state["currency"], state["order_id"]
+            )),
+            ("payment_image_url", lambda state: self.upload_payment_confirmation(
+                channel, user_id, state["payment_intent_id"]
+            )),
+        )
+        state: Dict[str, Any] = {}
         try:
-            currency = await self.select_currency(channel, user_id)
-            if not currency:
-                return
-
-            amount = await self.select_amount(channel, user_id, currency)
-            if not amount:
-                return
-
-            order_id = await self.provide_order_id(channel, user_id)
-            if not order_id:
-                return
-
-            payment_intent_id = await self.confirm_payment(channel, user_id, amount, currency, order_id)
-            if not payment_intent_id:
-                return
-
-            payment_image_url = await self.upload_payment_confirmation(channel, user_id, payment_intent_id)
-            if not payment_image_url:
-                return
+            for key, handler in steps:
+                value = await handler(state)
+                if not value:
+                    return
+                state[key] = value
 
             restart_view = RestartPaymentView(self)
 
@@ -165,9 +207,7 @@ class TicketCog(commands.Cog):
                 view=restart_view
             )
 
-            await self.notify_admins(
-                channel, user_id, amount, currency, order_id, payment_intent_id, payment_image_url
-            )
+            await self.notify_admins(channel, user_id, **state)
         except Exception as e:
             logger.error(f"Error in payment process for user {user_id}: {e}", exc_info=True)
             await channel.send("An error occurred during the payment process. Please contact support for assistance.")
@@ -175,11 +215,8 @@ class TicketCog(commands.Cog):
     async def select_currency(self, channel: discord.TextChannel, user_id: str) -> Optional[str]:
         """Prompt the user to select a currency."""
         currency_view = CurrencyView()
-        await channel.send(
-            f"<@{user_id}>, **Step 1: Select Your Payment Currency**\n\n"
-            "Please choose your payment currency from the following options:",
-            view=currency_view
-        )
+        embed = self._step_embeds["currency"]
+        await channel.send(f"<@{user_id}>", embed=embed, view=currency_view)
         await currency_view.wait()
         if currency_view.value is None:
             await self.handle_timeout(channel, f"<@{user_id}> You didn't select a currency in time.")
@@ -192,12 +229,9 @@ class TicketCog(commands.Cog):
         """Prompt the user to select the payment amount."""
         amounts = [59.95, 168.95, 666.95]
         amount_view = AmountSelectionView(amounts)
-        await channel.send(
-            f"<@{user_id}>, **Step 2: Select the Payment Amount**\n\n"
-            f"You have selected **{currency}** as your payment currency.\n"
-            "Please select the amount you have paid from the options below:",
-            view=amount_view
-        )
+        embed = self._step_embeds["amount"].copy()
+        embed.description = embed.description.format(currency=currency)
+        await channel.send(f"<@{user_id}>", embed=embed, view=amount_view)
         await amount_view.wait()
         if amount_view.value is None:
             await self.handle_timeout(channel, "You didn't select an amount in time.")
@@ -207,11 +241,8 @@ class TicketCog(commands.Cog):
     async def provide_order_id(self, channel: discord.TextChannel, user_id: str) -> Optional[str]:
         """Prompt the user to provide their Order ID."""
         order_id_view = OrderIDView()
-        await channel.send(
-            f"<@{user_id}>, **Step 3: Provide Your Order ID**\n\n"
-            "Please click the button below to enter your **Order ID** associated with this payment.",
-            view=order_id_view
-        )
+        embed = self._step_embeds["order_id"]
+        await channel.send(f"<@{user_id}>", embed=embed, view=order_id_view)
         await order_id_view.wait()
         if order_id_view.value is None:
             await self.handle_timeout(channel, "You didn't provide an Order ID in time.")
@@ -222,7 +253,7 @@ class TicketCog(commands.Cog):
         self, channel: discord.TextChannel, user_id: str, amount: float, currency: str, order_id: str
     ) -> Optional[str]:
         """Confirm the payment with the user."""
-        payment_intent = create_payment_intent(int(amount * 100), currency.lower(), order_id)
+        payment_intent = await create_payment_intent(int(amount * 100), currency.lower(), order_id)
         await channel.send(
             f"<@{user_id}>, **Step 4: Confirm Your Payment**\n\n"
             f"Your **PaymentIntent ID** is: {payment_intent.id}\n\n"
@@ -245,10 +276,7 @@ class TicketCog(commands.Cog):
         self, channel: discord.TextChannel, user_id: str, payment_intent_id: str
     ) -> Optional[str]:
         """Prompt the user to upload their payment confirmation."""
-        await channel.send(
-            "Please upload your payment confirmation image along with the PaymentIntent ID in this channel.\n\n"
-            "🔗 *Example:* pi_1Hh1XYZAbCdEfGhIjKlMnOpQ"
-        )
+        await channel.send(f"<@{user_id}>", embed=self._step_embeds["upload"])
 
         def payment_check(m):
             return m.author.id == int(user_id) and m.channel == channel and m.attachments
@@ -266,7 +294,7 @@ class TicketCog(commands.Cog):
 
     async def notify_admins(
         self, channel: discord.TextChannel, user_id: str, amount: float, currency: str,
-        order_id: str, payment_intent_id: str, image_url: str
+        order_id: str, payment_intent_id: str, payment_image_url: str
     ) -> None:
         """Notify admins about the new payment confirmation."""
         admin_channel = self.bot.get_channel(self.admin_user_id)
@@ -281,13 +309,26 @@ class TicketCog(commands.Cog):
             embed.add_field(name="Amount", value=f"{amount} {currency}", inline=True)
             embed.add_field(name="Order ID", value=order_id, inline=True)
             embed.add_field(name="PaymentIntent ID", value=payment_intent_id, inline=False)
-            embed.set_image(url=image_url)
+            embed.set_image(url=payment_image_url)
 
-            await admin_channel.send(embed=embed)
-            logger.info(f"Notified admins about payment confirmation for user {user_id}")
+            await self._admin_queue.put((admin_channel, embed, user_id))
         else:
             logger.error(f"Admin notification channel not found. Searched for channel ID: {self.admin_user_id}")
 
+    async def _drain_admin_queue(self) -> None:
+        """Send queued admin notifications one at a time; discord.py waits out rate limits."""
+        while True:
+            admin_channel, embed, user_id = await self._admin_queue.get()
+            try:
+                await admin_channel.send(embed=embed)
+                logger.info(f"Notified admins about payment confirmation for user {user_id}")
+            except Exception as e:
+                logger.error(
+                    f"Error notifying admins about payment for user {user_id}: {e}", exc_info=True
+                )
+            finally:
+                self._admin_queue.task_done()
+
     async def handle_timeout(self, channel: discord.TextChannel, message: str) -> None:
         """Handle timeouts and prompt the user to restart the process."""
         restart_view = RestartPaymentView(self)
@@ -297,41 +338,59 @@ class TicketCog(commands.Cog):
         )
 
     @staticmethod
-    async def get_user(db: AsyncSession, discord_id: str) -> Optional[User]:
-        """Retrieve a user from the database."""
-        result = await db.execute(select(User).filter(User.discord_id == discord_id))
+    async def get_user(db: AsyncSession, discord_id: int) -> Optional[User]:
+        """Retrieve a user's ID columns from the database."""
+        result = await db.execute(
+            select(User)
+            .options(load_only(User.id, User.discord_id))
+            .where(User.discord_id == discord_id)
+        )
         return result.scalar_one_or_none()
 
-    async def get_or_create_user(self, db: AsyncSession, discord_id: str) -> User:
-        """Get or create a user in the database."""
-        user = await self.get_user(db, discord_id)
-        if not user:
-            user = User(discord_id=int(discord_id))
-            db.add(user)
-            await db.commit()
-            logger.debug(f"Created new user in database with Discord ID {discord_id}")
+    async def get_or_create_user(self, db: AsyncSession, discord_id: int) -> User:
+        """Get or create a user in the database with a single upsert round trip."""
+        stmt = pg_insert(User).values(discord_id=discord_id)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[User.discord_id],
+            set_={"discord_id": stmt.excluded.discord_id},
+        ).returning(User)
+        result = await db.scalars(stmt, execution_options={"populate_existing": True})
+        user = result.one()
+        await db.commit()
+        logger.debug(f"Fetched or created user in database with Discord ID {discord_id}")
         return user
 
     async def get_existing_ticket(
         self, db: AsyncSession, user_id: int, channel_id: Optional[int] = None
     ) -> Optional[Ticket]:
         """Retrieve an existing ticket for a user."""
-        query = select(Ticket).where(
+        query = select(Ticket).options(load_only(Ticket.id, Ticket.channel_id)).where(
             Ticket.user_id == user_id,
             Ticket.closed_at.is_(None)
         )
         if channel_id:
-            query = query.filter(Ticket.channel_id == str(channel_id))
+            query = query.where(Ticket.channel_id == str(channel_id))
         result = await db.execute(query)
         return result.scalar_one_or_none()
 
-    @staticmethod
-    async def create_ticket_channel(guild: discord.Guild, member: discord.Member) -> discord.TextChannel:
+    def get_base_overwrites(self, guild: discord.Guild) -> Dict[Any, discord.PermissionOverwrite]:
+        """Return the cached guild-wide permission overwrites for ticket channels."""
+        base = self._overwrite_cache.get(guild.id)
+        if base is None:
+            base = {
+                guild.default_role: discord.PermissionOverwrite(read_messages=False),
+                guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True),
+            }
+            self._overwrite_cache[guild.id] = base
+        return base
+
+    async def create_ticket_channel(
+        self, guild: discord.Guild, member: discord.Member
+    ) -> discord.TextChannel:
         """Create a new ticket channel for the user."""
         overwrites = {
-            guild.default_role: discord.PermissionOverwrite(read_messages=False),
+            **self.get_base_overwrites(guild),
             member: discord.PermissionOverwrite(read_messages=True, send_messages=True),
-            guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True),
         }
         ticket_channel = await guild.create_text_channel(
             f'ticket-{member.name}-{member.discriminator}',
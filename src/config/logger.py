@@ -47,5 +47,13 @@ LOGGING = {
 }
 
 
+_configured = False
+
+
 def setup_logging():
+    """Apply the LOGGING config once per process; later calls are no-ops."""
+    global _configured
+    if _configured:
+        return
     logging.config.dictConfig(LOGGING)
+    _configured = True
@@ -1,16 +1,14 @@
-import logging.config
+import logging
 import os
+import string
 from dataclasses import dataclass
 from enum import Enum
 from typing import Any, Dict
 
 from dotenv import load_dotenv
 
-from src.config.logger import LOGGING
-
 load_dotenv()
 
-logging.config.dictConfig(LOGGING)
 logger = logging.getLogger(__name__)
 
 ticket_states: Dict[int, Any] = {}
@@ -21,9 +19,11 @@ class EnvSettings:
     DISCORD_BOT_TOKEN = os.getenv('DISCORD_BOT_TOKEN')
     PREMIUM_ROLE_ID = os.getenv('PREMIUM_ROLE_ID')
     STRIPE_SECRET_KEY = os.getenv('STRIPE_SECRET_KEY')
+    STRIPE_WEBHOOK_SECRET = os.getenv('STRIPE_WEBHOOK_SECRET')
     ADMIN_USER_ID = int(os.getenv('ADMIN_USER_ID'))
     DATABASE_URL = os.getenv('DATABASE_URL').replace('postgresql://', 'postgresql+asyncpg://')
     COMMAND_PREFIX = '/'
+    DEBUG_SQL = os.getenv('DEBUG_SQL', '').lower() in ('1', 'true', 'yes')
 
 
 class TicketState(Enum):
@@ -69,6 +69,10 @@ Also, did you subscribe to Sherlock's YouTube? (This way you can support him if
 [Sherlock's YouTube Channel](https://youtube.com/@sherlockwhale?si=JcXQVbHJBL8-pwX-)
 """
 
+_WELCOME_MESSAGE = string.Template(
+    WELCOME_MESSAGE_TEMPLATE.replace('{username}', '$username').replace('{days}', '$days')
+)
+
 
 def get_welcome_message(username: str, days: int) -> str:
     """
@@ -81,4 +85,4 @@ def get_welcome_message(username: str, days: int) -> str:
     Returns:
         str: The formatted welcome message.
     """
-    return WELCOME_MESSAGE_TEMPLATE.format(username=username, days=days)
+    return _WELCOME_MESSAGE.substitute(username=username, days=days)
@@ -1,18 +1,23 @@
 import asyncio
-import logging.config
+import logging
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator, Optional
+from functools import lru_cache
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
 
-from sqlalchemy import select, text
+from sqlalchemy import TextClause, bindparam, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import raiseload, selectinload
 
-from src.config.logger import LOGGING
 from src.config.settings import EnvSettings
 from src.core.models import Base, User
 
-logging.config.dictConfig(LOGGING)
 logger = logging.getLogger(__name__)
 
 DATABASE_URL = EnvSettings.DATABASE_URL
@@ -21,61 +26,172 @@ if not DATABASE_URL:
     logger.critical("DATABASE_URL environment variable not set.")
     raise EnvironmentError("DATABASE_URL environment variable not set.")
 
-engine = create_async_engine(DATABASE_URL, echo=False, pool_pre_ping=True)
+
+@lru_cache(maxsize=None)
+def get_engine() -> AsyncEngine:
+    """Return the process-wide async engine so every importer shares one connection pool."""
+    return create_async_engine(
+        DATABASE_URL,
+        echo=EnvSettings.DEBUG_SQL,
+        pool_pre_ping=False,
+        pool_size=20,
+        max_overflow=20,
+        pool_recycle=300,
+        pool_timeout=30,
+        query_cache_size=1200,
+        connect_args={
+            "server_settings": {
+                "jit": "off",
+                "application_name": "discord_roles",
+                "tcp_keepalives_idle": "60",
+            },
+            "statement_cache_size": 2048,
+            "prepared_statement_cache_size": 512,
+        },
+    )
+
+
+engine = get_engine()
 AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+_user_insert = pg_insert(User)
+_UPSERT_USER = _user_insert.on_conflict_do_update(
+    index_elements=[User.discord_id],
+    set_={
+        "username": _user_insert.excluded.username,
+        "subscription_start": _user_insert.excluded.subscription_start,
+        "subscription_end": _user_insert.excluded.subscription_end,
+    },
+)
+
+_user_by_discord_id = select(User).where(User.discord_id == bindparam("discord_id")).limit(1)
+_GET_USER_BY_DISCORD_ID = _user_by_discord_id.options(raiseload("*"))
+_GET_USER_WITH_TICKETS_BY_DISCORD_ID = _user_by_discord_id.options(selectinload(User.tickets))
+_GET_USER_BY_USER_ID = (
+    select(User).where(User.user_id == bindparam("user_id")).limit(1).options(raiseload("*"))
+)
+_GET_USER_ID_PREMIUM = (
+    select(User.id, User.premium).where(User.discord_id == bindparam("discord_id")).limit(1)
+)
+
+BULK_UPSERT_CHUNK_SIZE = 500
+
+
+@lru_cache(maxsize=None)
+def _sequence_sync_statement(table_name: str, primary_key: str) -> TextClause:
+    """Build the sequence resync statement for a table once, with its identifiers quoted."""
+    preparer = engine.dialect.identifier_preparer
+    table = preparer.quote(table_name)
+    column = preparer.quote(primary_key)
+    return text(
+        "WITH seq AS ("
+        "SELECT pg_get_serial_sequence(:table_name, :primary_key)::regclass AS name), "
+        f"bounds AS (SELECT GREATEST(COALESCE(MAX({column}), 0), "
+        f"COALESCE(pg_sequence_last_value((SELECT name FROM seq)), 0)) AS value FROM {table}) "
+        "SELECT setval((SELECT name FROM seq), GREATEST(value, 1), value > 0) FROM bounds"
+    )
+
 
 class DatabaseManager:
-    """Manages database operations using SQLAlchemy sessions."""
+    """
+    Manages database operations using SQLAlchemy sessions.
+
+    Methods are lock-free; the engine's connection pool bounds concurrency, so callers
+    should not wrap them in an asyncio.Lock.
+    """
 
-    def __init__(self, session_factory: sessionmaker):
+    def __init__(self, session_factory: async_sessionmaker):
         """Initialize the DatabaseManager with a session factory."""
         self.session_factory = session_factory
-        asyncio.run(self._create_tables())
 
-    @staticmethod
-    async def _create_tables() -> None:
-        """Create all tables defined in the Base metadata."""
+    @asynccontextmanager
+    async def unit_of_work(self) -> AsyncGenerator[AsyncSession, None]:
+        """Provide one session and transaction that several manager calls can share."""
+        async with self.session_factory() as session:
+            async with session.begin():
+                yield session
+
+    async def add_or_update_user(self, user: User, session: Optional[AsyncSession] = None) -> None:
+        """Add a new user to the database or update an existing user's information."""
+        if session is None:
+            async with self.unit_of_work() as session:
+                await self.add_or_update_user(user, session)
+            return
+
+        logger.info(f"Adding/updating user: {user.discord_id} - {user.username}")
         try:
-            async with engine.begin() as conn:
-                await conn.run_sync(Base.metadata.create_all)
-            logger.debug("Database tables created successfully.")
+            await session.execute(_UPSERT_USER, self._user_values(user))
+            logger.debug(f"User {user.discord_id} upsert executed.")
+        except IntegrityError as e:
+            logger.error(f"IntegrityError when adding/updating user {user.discord_id}: {e}")
+            raise
         except SQLAlchemyError as e:
-            logger.critical(f"Error creating database tables: {e}")
+            logger.error(f"SQLAlchemyError when adding/updating user {user.discord_id}: {e}")
             raise
 
-    async def add_or_update_user(self, user: User) -> None:
-        """Add a new user to the database or update an existing user's information."""
-        logger.info(f"Adding/updating user: {user.discord_id} - {user.username}")
-        async with self.session_factory() as session:
-            try:
-                existing_user = await session.execute(select(User).filter(User.discord_id == user.discord_id))
-                existing_user = existing_user.scalar_one_or_none()
-                if existing_user:
-                    logger.debug(f"User {user.discord_id} exists. Updating information.")
-                    existing_user.username = user.username
-                    existing_user.subscription_start = user.subscription_start
-                    existing_user.subscription_end = user.subscription_end
-                else:
-                    logger.debug(f"User {user.discord_id} does not exist. Adding new user.")
-                    session.add(user)
-                await session.commit()
-                logger.debug(f"User {user.discord_id} added/updated successfully.")
-            except IntegrityError as e:
-                logger.error(f"IntegrityError when adding/updating user {user.discord_id}: {e}")
-                await session.rollback()
-                raise
-            except SQLAlchemyError as e:
-                logger.error(f"SQLAlchemyError when adding/updating user {user.discord_id}: {e}")
-                await session.rollback()
-                raise
+    async def bulk_upsert_users(
+        self,
+        users: List[User],
+        chunk_size: int = BULK_UPSERT_CHUNK_SIZE,
+        session: Optional[AsyncSession] = None,
+    ) -> None:
+        """Add or update many users in a single transaction, batching the upserts in chunks."""
+        if session is None:
+            async with self.unit_of_work() as session:
+                await self.bulk_upsert_users(users, chunk_size, session)
+            return
+
+        values = list({user.discord_id: self._user_values(user) for user in users}.values())
+        logger.info(f"Bulk upserting {len(values)} users")
+        try:
+            for start in range(0, len(values), chunk_size):
+                await session.execute(_UPSERT_USER, values[start:start + chunk_size])
+            logger.debug(f"Bulk upsert of {len(values)} users executed.")
+        except SQLAlchemyError as e:
+            logger.error(f"SQLAlchemyError when bulk upserting users: {e}")
+            raise
+
+    @staticmethod
+    def _user_values(user: User) -> Dict[str, Any]:
+        """Return the column values used to upsert a user."""
+        return {
+            "discord_id": user.discord_id,
+            "user_id": user.user_id,
+            "username": user.username,
+            "subscription_start": user.subscription_start,
+            "subscription_end": user.subscription_end,
+        }
+
+    async def upsert_and_fetch(self, user: User, session: Optional[AsyncSession] = None) -> User:
+        """Add or update a user and return the stored row in the same round trip."""
+        if session is None:
+            async with self.unit_of_work() as session:
+                return await self.upsert_and_fetch(user, session)
+
+        logger.info(f"Upserting and fetching user: {user.discord_id} - {user.username}")
+        try:
+            result = await session.scalars(
+                _UPSERT_USER.returning(User),
+                self._user_values(user),
+                execution_options={"populate_existing": True},
+            )
+            return result.one()
+        except SQLAlchemyError as e:
+            logger.error(f"SQLAlchemyError when upserting user {user.discord_id}: {e}")
+            raise
 
-    async def get_user_by_discord_id(self, discord_id: str) -> Optional[User]:
-        """Retrieve a user from the database by their Discord ID."""
+    async def get_user_by_discord_id(
+        self, discord_id: int, load_tickets: bool = False
+    ) -> Optional[User]:
+        """Retrieve a user by their Discord ID, optionally eager-loading their tickets."""
         logger.info(f"Retrieving user with Discord ID: {discord_id}")
+        if load_tickets:
+            statement = _GET_USER_WITH_TICKETS_BY_DISCORD_ID
+        else:
+            statement = _GET_USER_BY_DISCORD_ID
         async with self.session_factory() as session:
             try:
-                result = await session.execute(select(User).filter(User.discord_id == discord_id))
+                result = await session.execute(statement, {"discord_id": discord_id})
                 user = result.scalar_one_or_none()
                 if user:
                     logger.debug(f"User {discord_id} found.")
@@ -86,28 +202,40 @@ class DatabaseManager:
                 logger.error(f"Error retrieving user {discord_id}: {e}")
                 return None
 
+    async def get_user_id_premium(self, discord_id: int) -> Optional[Tuple[int, bool]]:
+        """Retrieve only a user's database ID and premium flag by their Discord ID."""
+        async with self.session_factory() as session:
+            try:
+                result = await session.execute(_GET_USER_ID_PREMIUM, {"discord_id": discord_id})
+                row = result.one_or_none()
+                return (row.id, bool(row.premium)) if row else None
+            except SQLAlchemyError as e:
+                logger.error(f"Error retrieving premium status for user {discord_id}: {e}")
+                return None
+
+    async def get_user_by_user_id(self, user_id: int) -> Optional[User]:
+        """Retrieve a user from the database by their user ID."""
+        logger.info(f"Retrieving user with user ID: {user_id}")
+        async with self.session_factory() as session:
+            try:
+                result = await session.execute(_GET_USER_BY_USER_ID, {"user_id": user_id})
+                return result.scalar_one_or_none()
+            except SQLAlchemyError as e:
+                logger.error(f"Error retrieving user with user ID {user_id}: {e}")
+                return None
+
     async def check_and_reset_sequence(self, table_name: str, primary_key: str) -> None:
-        """Check and reset the sequence for the primary key if it is out of sync."""
+        """Move the primary key sequence past the highest existing ID in a single round trip."""
         logger.info(f"Checking and resetting sequence for {table_name}.{primary_key}")
         async with self.session_factory() as session:
             try:
-                max_id_result = await session.execute(text(f"SELECT MAX({primary_key}) FROM {table_name}"))
-                max_id = max_id_result.scalar()
-                next_val_result = await session.execute(
-                    text(f"SELECT nextval(pg_get_serial_sequence('{table_name}', '{primary_key}'))")
+                result = await session.execute(
+                    _sequence_sync_statement(table_name, primary_key),
+                    {"table_name": table_name, "primary_key": primary_key},
                 )
-                next_val = next_val_result.scalar()
-                logger.debug(f"Max ID: {max_id}, Next Value: {next_val}")
-
-                if max_id is not None and next_val is not None and max_id >= next_val:
-                    new_val = max_id + 1
-                    await session.execute(
-                        text(f"SELECT setval(pg_get_serial_sequence('{table_name}', '{primary_key}'), {new_val})")
-                    )
-                    await session.commit()
-                    logger.info(f"Sequence for {table_name}.{primary_key} reset to {new_val}")
-                else:
-                    logger.debug("No need to reset sequence.")
+                new_val = result.scalar()
+                await session.commit()
+                logger.debug(f"Sequence for {table_name}.{primary_key} synced to {new_val}")
             except SQLAlchemyError as e:
                 logger.error(f"Error checking/resetting sequence for {table_name}.{primary_key}: {e}")
                 await session.rollback()
@@ -120,10 +248,11 @@ async def init_db(max_retries: int = 5, retry_delay: int = 5) -> None:
     for attempt in range(1, max_retries + 1):
         try:
             async with engine.begin() as conn:
+                await conn.execute(text("SET LOCAL synchronous_commit = off"))
                 logger.debug("Dropping all tables.")
                 await conn.run_sync(Base.metadata.drop_all)
                 logger.debug("Creating all tables.")
-                await conn.run_sync(Base.metadata.create_all)
+                await conn.run_sync(Base.metadata.create_all, checkfirst=False)
             logger.info("Database tables dropped and created successfully.")
             return
         except SQLAlchemyError as e:
@@ -146,5 +275,3 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.rollback()
             logger.error(f"Database error: {e}")
             raise
-        finally:
-            await session.close()
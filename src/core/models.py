@@ -1,6 +1,15 @@
-from datetime import datetime
-
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    func,
+    text,
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -13,13 +22,13 @@ class User(Base):
     __tablename__ = 'users'
 
     id = Column(Integer, primary_key=True)
-    discord_id = Column(Integer, unique=True, nullable=False)
-    user_id = Column(Integer, unique=True, nullable=True)
+    discord_id = Column(BigInteger, unique=True, nullable=False, index=True)
+    user_id = Column(BigInteger, unique=True, nullable=True, index=True)
     username = Column(String, nullable=True)
     subscription_start = Column(DateTime, nullable=True)
     subscription_end = Column(DateTime, nullable=True)
     premium = Column(Boolean, default=False)
-    tickets = relationship("Ticket", back_populates="user")
+    tickets = relationship("Ticket", back_populates="user", lazy="raise_on_sql")
 
     def set_subscription(self, subscription) -> None:
         """Set the subscription start and end dates for the user."""
@@ -31,11 +40,14 @@ class Ticket(Base):
     """Represents a support ticket in the database."""
 
     __tablename__ = 'tickets'
+    __table_args__ = (
+        Index('ix_tickets_user_open', 'user_id', postgresql_where=text('closed_at IS NULL')),
+    )
 
     id = Column(Integer, primary_key=True)
     channel_id = Column(String, nullable=False)
     user_id = Column(Integer, ForeignKey('users.id'))
-    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
     closed_at = Column(DateTime, nullable=True)
     deleted_at = Column(DateTime, nullable=True)
     user = relationship("User", back_populates="tickets")
@@ -52,4 +64,4 @@ class Payment(Base):
     order_id = Column(String, nullable=False, unique=True)
     confirmed = Column(Boolean, default=False)
     confirmation_image = Column(String, nullable=True)
-    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -1,19 +1,187 @@
-import logging.config
-from datetime import datetime
-from typing import Optional
+import asyncio
+import logging
+import random
+import time
+import uuid
+from functools import cache
+from typing import Awaitable, Callable, List, Optional, TypeVar, Union
 
+import anyio
+import httpx
 import stripe
+from cachetools import TLRUCache, TTLCache
 
-from src.config.logger import LOGGING
 from src.config.settings import EnvSettings
 
-logging.config.dictConfig(LOGGING)
 logger = logging.getLogger(__name__)
 
-stripe.api_key = EnvSettings.STRIPE_SECRET_KEY
+SECONDS_PER_DAY = 24 * 60 * 60
 
+CUSTOMER_CACHE_TTL = 300
+PAYMENT_INTENT_CACHE_TTL = 60
+PAYMENT_INTENT_TERMINAL_CACHE_TTL = SECONDS_PER_DAY
+PAYMENT_INTENT_STALE_TTL = SECONDS_PER_DAY
 
-def create_payment_intent(amount: int, currency: str, order_id: str) -> stripe.PaymentIntent:
+_ACCEPTABLE_STATUSES = frozenset({'succeeded', 'processing', 'requires_capture'})
+_TERMINAL_STATUSES = frozenset({'succeeded', 'canceled'})
+_CACHEABLE_STATUSES = _ACCEPTABLE_STATUSES | _TERMINAL_STATUSES
+
+STRIPE_CONCURRENCY = 25
+STRIPE_MAX_RETRIES = 3
+STRIPE_RETRY_BASE_DELAY = 0.25
+STRIPE_RETRY_MAX_DELAY = 4.0
+STRIPE_KEEPALIVE_EXPIRY = 30.0
+STRIPE_BREAKER_FAILURE_THRESHOLD = 10
+STRIPE_BREAKER_RESET_TIMEOUT = 30.0
+
+_TRANSIENT_STRIPE_ERRORS = (
+    stripe.error.APIConnectionError,
+    stripe.error.RateLimitError,
+    stripe.error.APIError,
+)
+
+T = TypeVar('T')
+
+
+class StripeCircuitOpenError(stripe.error.APIConnectionError):
+    """Raised instead of calling Stripe while the circuit breaker is open."""
+
+
+class _CircuitBreaker:
+    """
+    Stop calling Stripe for a while after too many consecutive transient failures.
+
+    Once the reset timeout passes, a single caller is let through as a probe; everyone
+    else keeps getting StripeCircuitOpenError until that probe succeeds.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    def check(self) -> None:
+        """Raise StripeCircuitOpenError while open, letting one probe through after the timeout."""
+        if self._failures < self.failure_threshold:
+            return
+        if self._probing or time.monotonic() - self._opened_at < self.reset_timeout:
+            raise StripeCircuitOpenError("Stripe circuit breaker is open; not calling Stripe.")
+        self._probing = True
+
+    def record_success(self) -> None:
+        """Close the breaker after a call gets an answer from Stripe."""
+        if self._failures >= self.failure_threshold:
+            logger.info("Stripe circuit breaker closed")
+        self._failures = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        """Count a transient failure, (re)opening the breaker once the threshold is reached."""
+        self._failures += 1
+        self._probing = False
+        if self._failures >= self.failure_threshold:
+            if self._failures == self.failure_threshold:
+                logger.error(
+                    "Stripe circuit breaker opened after %d consecutive failures", self._failures
+                )
+            self._opened_at = time.monotonic()
+
+    def release_probe(self) -> None:
+        """Let another caller probe when a probe ends without a verdict, e.g. on cancellation."""
+        self._probing = False
+
+
+_stripe_breaker = _CircuitBreaker(STRIPE_BREAKER_FAILURE_THRESHOLD, STRIPE_BREAKER_RESET_TIMEOUT)
+
+
+class PooledHTTPXClient(stripe.HTTPXClient):
+    """
+    Stripe's HTTPX client with a keep-alive pool sized for STRIPE_CONCURRENCY calls.
+
+    HTTPXClient.__init__ is skipped because it builds its own unpooled httpx clients,
+    which would only be discarded unclosed; this sets up the same attributes instead.
+    """
+
+    def __init__(self, timeout: float = 80, allow_sync_methods: bool = True, **kwargs):
+        stripe.HTTPClient.__init__(self, **kwargs)
+        self.httpx = httpx
+        self.anyio = anyio
+        client_kwargs = {
+            "verify": stripe.ca_bundle_path if self._verify_ssl_certs else False,
+            "limits": httpx.Limits(
+                max_connections=STRIPE_CONCURRENCY,
+                max_keepalive_connections=STRIPE_CONCURRENCY,
+                keepalive_expiry=STRIPE_KEEPALIVE_EXPIRY,
+            ),
+        }
+        self._client_async = httpx.AsyncClient(**client_kwargs)
+        self._client = httpx.Client(**client_kwargs) if allow_sync_methods else None
+        self._timeout = timeout
+
+
+@cache
+def configure_stripe() -> None:
+    """Set the Stripe API key and shared HTTP client once per process."""
+    stripe.api_key = EnvSettings.STRIPE_SECRET_KEY
+    stripe.default_http_client = PooledHTTPXClient(
+        proxy=stripe.proxy, verify_ssl_certs=stripe.verify_ssl_certs
+    )
+
+
+_customer_cache: TTLCache = TTLCache(maxsize=1024, ttl=CUSTOMER_CACHE_TTL)
+
+
+def _payment_intent_ttu(_key: str, payment_intent: stripe.PaymentIntent, now: float) -> float:
+    """Keep terminal PaymentIntents for a day and accepted ones still in flight for a minute."""
+    if payment_intent.status in _TERMINAL_STATUSES:
+        return now + PAYMENT_INTENT_TERMINAL_CACHE_TTL
+    return now + PAYMENT_INTENT_CACHE_TTL
+
+
+_payment_intent_cache: TLRUCache = TLRUCache(maxsize=1024, ttu=_payment_intent_ttu)
+_payment_intent_last_known: TTLCache = TTLCache(maxsize=4096, ttl=PAYMENT_INTENT_STALE_TTL)
+
+
+def invalidate_payment_intent(payment_intent_id: str) -> None:
+    """Drop a cached PaymentIntent, e.g. when a Stripe webhook reports a status change."""
+    _payment_intent_cache.pop(payment_intent_id, None)
+
+
+def invalidate_customer(customer_id: str) -> None:
+    """Drop every cached lookup that resolved to the given customer."""
+    for cache_key, customer in list(_customer_cache.items()):
+        if customer.id == customer_id:
+            _customer_cache.pop(cache_key, None)
+
+
+def handle_stripe_event(event: stripe.Event) -> None:
+    """
+    Invalidate the cached Stripe objects a verified webhook event reports a change to.
+
+    Args:
+        event (stripe.Event): The event delivered to the webhook endpoint.
+    """
+    event_object = event.data.object
+    if event.type.startswith('payment_intent.'):
+        invalidate_payment_intent(event_object.id)
+        logger.info(
+            "Cached PaymentIntent %s invalidated by %s event", event_object.id, event.type
+        )
+    elif event.type.startswith('customer.subscription.'):
+        invalidate_customer(event_object.customer)
+        logger.info(
+            "Cached customer %s invalidated by %s event", event_object.customer, event.type
+        )
+    elif event.type in ('customer.updated', 'customer.deleted'):
+        invalidate_customer(event_object.id)
+        logger.info("Cached customer %s invalidated by %s event", event_object.id, event.type)
+    else:
+        logger.debug("Ignoring Stripe event %s of type %s", event.id, event.type)
+
+
+async def create_payment_intent(amount: int, currency: str, order_id: str) -> stripe.PaymentIntent:
     """
     Create a PaymentIntent on Stripe.
 
@@ -25,45 +193,158 @@ def create_payment_intent(amount: int, currency: str, order_id: str) -> stripe.P
     Returns:
         stripe.PaymentIntent: The created PaymentIntent object.
     """
+    idempotency_key = f"pi:{uuid.uuid4()}"
     try:
-        payment_intent = stripe.PaymentIntent.create(
-            amount=amount,
-            currency=currency,
-            payment_method_types=["card"],
-            metadata={"order_id": order_id}
+        payment_intent = await _call_with_retries(
+            lambda: stripe.PaymentIntent.create_async(
+                amount=amount,
+                currency=currency,
+                payment_method_types=["card"],
+                metadata={"order_id": order_id},
+                idempotency_key=idempotency_key,
+            ),
+            f"creating PaymentIntent for order {order_id}",
         )
-        logger.info(f"PaymentIntent created: {payment_intent.id}")
+        logger.info("PaymentIntent created: %s", payment_intent.id)
         return payment_intent
     except stripe.error.StripeError as e:
-        logger.error(f"Error creating PaymentIntent: {e}")
+        logger.error("Error creating PaymentIntent: %s", e)
         raise
 
 
-def get_customer_by_email(email: str) -> Optional[stripe.Customer]:
+async def _fetch_customer_by_email(
+    email: str, with_subscriptions: bool = False
+) -> Optional[stripe.Customer]:
+    """Look up the first customer by email, preferring the cache; raises Stripe errors."""
+    cache_key = (email, with_subscriptions)
+    cached_customer = _customer_cache.get(cache_key)
+    if cached_customer is not None:
+        logger.debug("Customer for email %s served from cache: %s", email, cached_customer.id)
+        return cached_customer
+
+    params = {"limit": 1}
+    if with_subscriptions:
+        params["expand"] = ['data.subscriptions']
+    escaped_email = email.replace('\\', '\\\\').replace('"', '\\"')
+    try:
+        customers = await _call_with_retries(
+            lambda: stripe.Customer.search_async(query=f'email:"{escaped_email}"', **params),
+            f"searching for customer {email}",
+        )
+    except stripe.error.InvalidRequestError as e:
+        logger.warning("Customer search unavailable, falling back to listing by email: %s", e)
+        customers = None
+
+    # Search is eventually consistent; a customer created moments ago may only show up in a list.
+    if customers is None or not customers.data:
+        customers = await _call_with_retries(
+            lambda: stripe.Customer.list_async(email=email, **params),
+            f"listing customers for {email}",
+        )
+
+    if not customers.data:
+        logger.info("No customers found with the email: %s", email)
+        return None
+
+    logger.debug("Customer found with email %s: %s", email, customers.data[0].id)
+    _customer_cache[cache_key] = customers.data[0]
+    return customers.data[0]
+
+
+async def get_customers_by_emails(
+    emails: List[str], *, with_subscriptions: bool = False
+) -> List[Union[Optional[stripe.Customer], BaseException]]:
+    """
+    Retrieve customers for many emails concurrently, bounded to respect Stripe's rate limit.
+
+    Args:
+        emails (List[str]): The customers' email addresses.
+        with_subscriptions (bool): Whether to expand each customer's subscriptions.
+
+    Returns:
+        List[Union[Optional[stripe.Customer], BaseException]]: One result per email, in order;
+        a lookup that still fails after retrying yields its exception instead of a customer.
+    """
+    semaphore = asyncio.Semaphore(STRIPE_CONCURRENCY)
+    started = time.monotonic()
+
+    async def fetch(email: str) -> Optional[stripe.Customer]:
+        async with semaphore:
+            return await _fetch_customer_by_email(email, with_subscriptions)
+
+    results = await asyncio.gather(*map(fetch, emails), return_exceptions=True)
+    elapsed = max(time.monotonic() - started, 1e-6)
+    logger.info(
+        "Resolved %d customers in %.2fs (%.1f req/s)", len(emails), elapsed, len(emails) / elapsed
+    )
+    return results
+
+
+async def _call_with_retries(call: Callable[[], Awaitable[T]], description: str) -> T:
+    """
+    Await a Stripe call behind the shared circuit breaker, retrying transient errors with backoff.
+
+    Raises StripeCircuitOpenError without calling Stripe while the breaker is open.
+    """
+    for attempt in range(STRIPE_MAX_RETRIES + 1):
+        _stripe_breaker.check()
+        try:
+            result = await call()
+        except _TRANSIENT_STRIPE_ERRORS as e:
+            if isinstance(e, stripe.error.APIError) and not _is_upstream_failure(e):
+                _stripe_breaker.record_success()
+                raise
+            _stripe_breaker.record_failure()
+            if attempt == STRIPE_MAX_RETRIES:
+                raise
+            delay = _retry_delay(e, attempt)
+            logger.warning(
+                "Transient Stripe error %s, retrying in %.2fs: %s", description, delay, e
+            )
+            await asyncio.sleep(delay)
+        except stripe.error.StripeError:
+            # Stripe answered and rejected the request, so it is reachable.
+            _stripe_breaker.record_success()
+            raise
+        except BaseException:
+            _stripe_breaker.release_probe()
+            raise
+        else:
+            _stripe_breaker.record_success()
+            return result
+    raise AssertionError("unreachable: the last attempt either returns or raises")
+
+
+def _retry_delay(error: stripe.error.StripeError, attempt: int) -> float:
+    """Honour Stripe's Retry-After header, capped at STRIPE_RETRY_MAX_DELAY, else back off."""
+    headers = {key.lower(): value for key, value in (error.headers or {}).items()}
+    retry_after = headers.get('retry-after')
+    if retry_after:
+        try:
+            return min(float(retry_after), STRIPE_RETRY_MAX_DELAY)
+        except ValueError:
+            pass
+    backoff = min(STRIPE_RETRY_BASE_DELAY * 2 ** attempt, STRIPE_RETRY_MAX_DELAY)
+    return backoff + random.uniform(0, STRIPE_RETRY_BASE_DELAY)
+
+
+async def get_customer_by_email(
+    email: str, *, with_subscriptions: bool = False
+) -> Optional[stripe.Customer]:
     """
     Retrieve the first customer by email.
 
     Args:
         email (str): The customer's email address.
+        with_subscriptions (bool): Whether to expand the customer's subscriptions.
 
     Returns:
         Optional[stripe.Customer]: The Stripe Customer object if found, else None.
     """
     try:
-        customers = stripe.Customer.list(
-            email=email,
-            expand=['data.subscriptions']
-        )
-
-        if not customers.data:
-            logger.info(f"No customers found with the email: {email}")
-            return None
-
-        logger.debug(f"Customer found with email {email}: {customers.data[0].id}")
-        return customers.data[0]
-
+        return await _fetch_customer_by_email(email, with_subscriptions)
     except stripe.error.StripeError as e:
-        logger.error(f"Stripe error while retrieving customer: {e}")
+        logger.error("Stripe error while retrieving customer: %s", e)
         return None
 
 
@@ -81,13 +362,19 @@ def get_active_subscription(customer: stripe.Customer) -> Optional[stripe.Subscr
         logger.info("No subscription found for the customer.")
         return None
 
-    for subscription in customer.subscriptions.data:
-        if subscription.status == 'active':
-            logger.debug(f"Active subscription found: {subscription.id}")
-            return subscription
+    if customer.subscriptions.get("has_more"):
+        logger.warning(
+            "Customer %s has more subscriptions than were returned; "
+            "only the first page was checked.",
+            customer.id,
+        )
 
-    logger.info("No active subscription found for the customer.")
-    return None
+    subscription = next((s for s in customer.subscriptions.data if s["status"] == 'active'), None)
+    if subscription is None:
+        logger.info("No active subscription found for the customer.")
+    else:
+        logger.debug("Active subscription found: %s", subscription.id)
+    return subscription
 
 
 def calculate_remaining_days(subscription: stripe.Subscription) -> int:
@@ -100,13 +387,13 @@ def calculate_remaining_days(subscription: stripe.Subscription) -> int:
     Returns:
         int: Number of remaining days in the subscription.
     """
-    current_period_end = datetime.fromtimestamp(subscription.current_period_end)
-    remaining_days = (current_period_end - datetime.utcnow()).days
-    logger.debug(f"Remaining days for subscription {subscription.id}: {remaining_days}")
+    remaining_seconds = subscription.current_period_end - int(time.time())
+    remaining_days = max(0, remaining_seconds // SECONDS_PER_DAY)
+    logger.debug("Remaining days for subscription %s: %d", subscription.id, remaining_days)
     return remaining_days
 
 
-def verify_payment_intent(payment_intent_id: str) -> Optional[stripe.PaymentIntent]:
+async def verify_payment_intent(payment_intent_id: str) -> Optional[stripe.PaymentIntent]:
     """
     Verify the payment intent with Stripe.
 
@@ -117,19 +404,41 @@ def verify_payment_intent(payment_intent_id: str) -> Optional[stripe.PaymentInte
         Optional[stripe.PaymentIntent]: The PaymentIntent object if valid, else None.
     """
     try:
-        payment_intent = stripe.PaymentIntent.retrieve(payment_intent_id)
-        acceptable_statuses = ['succeeded', 'processing', 'requires_capture']
-        if payment_intent.status in acceptable_statuses:
-            logger.info(
-                f"PaymentIntent {payment_intent_id} verified successfully with status '{payment_intent.status}'."
+        payment_intent = _payment_intent_cache.get(payment_intent_id)
+        if payment_intent is None:
+            payment_intent = await _call_with_retries(
+                lambda: stripe.PaymentIntent.retrieve_async(payment_intent_id),
+                f"retrieving PaymentIntent {payment_intent_id}",
             )
-            return payment_intent
-        else:
-            logger.warning(
-                f"PaymentIntent {payment_intent_id} has unacceptable status '{payment_intent.status}'."
-            )
-            return None
+            if payment_intent.status in _CACHEABLE_STATUSES:
+                _payment_intent_cache[payment_intent_id] = payment_intent
+            _payment_intent_last_known[payment_intent_id] = payment_intent
     except stripe.error.StripeError as e:
-        logger.error(f"Error retrieving PaymentIntent {payment_intent_id}: {e}")
-        return None
+        stale_payment_intent = _payment_intent_last_known.get(payment_intent_id)
+        if stale_payment_intent is None or not _is_upstream_failure(e):
+            logger.error("Error retrieving PaymentIntent %s: %s", payment_intent_id, e)
+            return None
+        logger.warning("served stale PI status for %s: %s", payment_intent_id, e)
+        payment_intent = stale_payment_intent
+
+    if payment_intent.status in _ACCEPTABLE_STATUSES:
+        logger.info(
+            "PaymentIntent %s verified successfully with status '%s'.",
+            payment_intent_id,
+            payment_intent.status,
+        )
+        return payment_intent
+    logger.warning(
+        "PaymentIntent %s has unacceptable status '%s'.", payment_intent_id, payment_intent.status
+    )
+    return None
+
+
+def _is_upstream_failure(error: stripe.error.StripeError) -> bool:
+    """Tell Stripe being unreachable or failing server-side apart from errors in the request."""
+    if isinstance(error, stripe.error.APIConnectionError):
+        return True
+    if not isinstance(error, stripe.error.APIError):
+        return False
+    return error.http_status is None or error.http_status >= 500
 
@@ -1,20 +1,43 @@
 import asyncio
-import logging.config
-
-import stripe
-from dotenv import load_dotenv
+import logging
+import sys
+from functools import cache
 
 from src.bot.discord_bot import DiscordBot
-from src.config.logger import LOGGING
+from src.config.logger import setup_logging
 from src.config.settings import EnvSettings
 from src.core.database import init_db
+from src.core.utils import configure_stripe
 
-load_dotenv()
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
-logging.config.dictConfig(LOGGING)
 logger = logging.getLogger(__name__)
 
 
+@cache
+def _bootstrap() -> None:
+    """Configure logging and Stripe and check the bot token; repeated calls are no-ops."""
+    setup_logging()
+    if not EnvSettings.DISCORD_BOT_TOKEN:
+        logger.critical("DISCORD_BOT_TOKEN environment variable not set.")
+        raise EnvironmentError("DISCORD_BOT_TOKEN environment variable not set.")
+    configure_stripe()
+
+
+def _install_uvloop() -> None:
+    """Run the bot on uvloop where it is available, falling back to the default asyncio loop."""
+    if sys.platform == 'win32':
+        return
+    if uvloop is None:
+        logger.info("uvloop not installed; using the default asyncio event loop.")
+        return
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    logger.debug("Using uvloop event loop.")
+
+
 async def main() -> None:
     """Initialize and start the Discord bot."""
     try:
@@ -23,7 +46,6 @@ async def main() -> None:
         logger.critical(f"Failed to initialize the database: {e}")
         return
 
-    stripe.api_key = EnvSettings.STRIPE_SECRET_KEY
     bot = DiscordBot(
         command_prefix=EnvSettings.COMMAND_PREFIX,
         premium_role_id=int(EnvSettings.PREMIUM_ROLE_ID),
@@ -41,4 +63,6 @@ async def main() -> None:
 
 
 if __name__ == '__main__':
+    _bootstrap()
+    _install_uvloop()
     asyncio.run(main())